@@ -9,11 +9,23 @@ Author: AI Assistant
 Version: 2.0 (Refactored)
 """
 
+import logging
+import os
+
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Configure logging; set LOG_LEVEL=DEBUG to see the prompts sent to OpenAI
+_log_level_name = os.getenv("LOG_LEVEL", "WARNING").strip().upper()
+_log_level = logging.getLevelName(_log_level_name)
+# Unknown level names fall back to the default instead of aborting startup
+_log_level_valid = isinstance(_log_level, int)
+logging.basicConfig(level=_log_level if _log_level_valid else logging.WARNING)
+if not _log_level_valid:
+    logging.warning("Unknown LOG_LEVEL %r; using WARNING", _log_level_name)
+
 # Import the main orchestrator
 from src.communication_orchestrator import CommunicationOrchestrator
 
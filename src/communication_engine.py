@@ -4,39 +4,197 @@ Communication Engine Module
 Handles OpenAI API interactions and response generation logic.
 """
 
-import re
+import asyncio
+import dbm
+import hashlib
+import json
+import logging
 import os
-from typing import Dict, Optional
-from openai import OpenAI
+import random
+import shelve
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Callable, Dict, List, Mapping, Optional, Tuple
+
+import httpx
+import numpy as np
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI, OpenAI, RateLimitError
+
+from .embedding_cache import EmbeddingCache
+from .rate_limiter import TokenBucket
+
+try:
+    import tiktoken
+except ImportError:  # Token estimates fall back to a character count
+    tiktoken = None
+
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_BATCH_SIZE = 64
+RESPONSE_CACHE_SIZE = 512
+# Shelve entry listing the persisted keys oldest first; cache keys are hex digests, so it cannot collide
+_SHELVE_ORDER_KEY = "__order__"
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# Maximum deviation percentage and generation instruction for each tolerance level
+_TOLERANCE: Mapping[str, Tuple[int, str]] = MappingProxyType({
+    "strict": (
+        10,
+        "Follow the standard response EXACTLY. Make only minimal changes necessary to address the specific customer inquiry. Deviation should be less than 10%."
+    ),
+    "minimal": (
+        25,
+        "Follow the standard response closely but allow minor modifications to better address the customer inquiry. Deviation should be less than 25%."
+    ),
+    "moderate": (
+        50,
+        "Use the standard response as a strong guideline but allow moderate changes to personalize and improve the response. Deviation should be less than 50%."
+    ),
+    "flexible": (
+        70,
+        "Use the standard response as a foundation but feel free to significantly modify to create the best possible response. Deviation can be up to 70%."
+    )
+})
+_DEFAULT_TOLERANCE = _TOLERANCE["minimal"]
+
+# Generation prompt; kept compact, with the instructions stated once in the system message
+_GEN_SYSTEM_MESSAGE = (
+    "You are a corporate customer service representative. Personalize the organization's "
+    "standard response template to address the customer inquiry, keeping its approved language, "
+    "tone, structure and required corporate elements. Do not deviate beyond the deviation guidelines."
+)
+_GEN_PROMPT_TMPL = (
+    "Customer Inquiry: {inquiry}\n\n"
+    "Organization's Standard Response Template:\n{standard}\n\n"
+    "Deviation Guidelines: {instruction}"
+)
+TOKEN_ENCODING_NAME = "cl100k_base"
+
+# Connection pool settings shared by every OpenAI client so requests reuse warm connections
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=60.0)
+_HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+_HTTP = httpx.Client(http2=True, limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT)
+
+# Exponential backoff for rate limited and transient server errors
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+RETRY_JITTER = 1.0
+
+
+def _cache_key(*parts: Any) -> str:
+    """Hash call arguments into a compact, shelve-compatible cache key"""
+    # JSON keeps part boundaries unambiguous, unlike joining on a separator
+    joined = json.dumps(parts, default=str, ensure_ascii=False)
+    return hashlib.blake2b(joined.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# Changes whenever the generation prompt does, so edited prompts never serve stale responses
+_PROMPT_FINGERPRINT = _cache_key(
+    _GEN_SYSTEM_MESSAGE, _GEN_PROMPT_TMPL, sorted(_TOLERANCE.items())
+)
+
+
+def _response_cache_key(
+    model: str,
+    max_tokens: int,
+    deviation_tolerance: str,
+    standard_response: str,
+    customer_inquiry: str
+) -> str:
+    """Cache key of a generated response, covering every input to the prompt"""
+    return _cache_key(
+        "response", _PROMPT_FINGERPRINT, model, max_tokens,
+        deviation_tolerance, standard_response, customer_inquiry
+    )
+
+
+@lru_cache(maxsize=32)
+def _count_static_tokens(text: str) -> int:
+    """Count the tokens of a static prompt string once, falling back to a character estimate"""
+    if tiktoken is not None:
+        try:
+            return len(tiktoken.get_encoding(TOKEN_ENCODING_NAME).encode(text))
+        except Exception:
+            # The encoding files are downloaded on first use and may be unavailable offline
+            pass
+    return len(text) // 4
+
+
+def _estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    """Estimate the tokens a chat completion counts against the rate limit"""
+    tokens = max_tokens
+    for message in messages:
+        if message["role"] == "system":
+            tokens += _count_static_tokens(message["content"])
+        else:
+            tokens += len(message["content"]) // 4
+    return tokens
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Check whether an API error is transient and worth retrying"""
+    if isinstance(error, (RateLimitError, APIConnectionError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+def _retry_delay(attempt: int) -> float:
+    """Get the backoff delay before a retry attempt"""
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt) + random.uniform(0, RETRY_JITTER)
 
 
 class CommunicationEngine:
     """Handles OpenAI communication and response generation"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cache_path: Optional[str] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        embedding_cache: Optional[EmbeddingCache] = None
+    ):
         # Get API key from parameter, environment variable, or raise error
         api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OpenAI API key not found. Please set OPENAI_API_KEY environment variable or pass api_key parameter.")
-        self.client = OpenAI(api_key=api_key)
-        self.deviation_tolerance_settings = {
-            "strict": {
-                "limit": 10,
-                "instruction": "Follow the standard response EXACTLY. Make only minimal changes necessary to address the specific customer inquiry. Deviation should be less than 10%."
-            },
-            "minimal": {
-                "limit": 25,
-                "instruction": "Follow the standard response closely but allow minor modifications to better address the customer inquiry. Deviation should be less than 25%."
-            },
-            "moderate": {
-                "limit": 50,
-                "instruction": "Use the standard response as a strong guideline but allow moderate changes to personalize and improve the response. Deviation should be less than 50%."
-            },
-            "flexible": {
-                "limit": 70,
-                "instruction": "Use the standard response as a foundation but feel free to significantly modify to create the best possible response. Deviation can be up to 70%."
-            }
-        }
+        self.client = OpenAI(api_key=api_key, http_client=_HTTP)
+        self.rate_limiter = rate_limiter or TokenBucket()
+        # Local embedding model used for deviation scoring, loaded on first use
+        self._embedding_model = None
+        self._embedding_lock = threading.Lock()
+        self.embedding_cache = embedding_cache or EmbeddingCache()
+        # Memoized results of identical calls, optionally persisted with shelve
+        self.cache_path = cache_path
+        self._response_cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+    
+    def build_generation_messages(
+        self,
+        customer_inquiry: str,
+        standard_response: str,
+        deviation_tolerance: str = "minimal"
+    ) -> List[Dict[str, str]]:
+        """Build the chat messages for personalizing a standard response"""
+        
+        _, instruction = _TOLERANCE.get(deviation_tolerance, _DEFAULT_TOLERANCE)
+        prompt = _GEN_PROMPT_TMPL.format_map({
+            "inquiry": customer_inquiry.strip(),
+            "standard": standard_response.strip(),
+            "instruction": instruction
+        })
+        
+        logger.debug("prompt=%s", prompt)
+        return [
+            {"role": "system", "content": _GEN_SYSTEM_MESSAGE},
+            {"role": "user", "content": prompt}
+        ]
     
     def generate_personalized_response(
         self,
@@ -44,92 +202,426 @@ class CommunicationEngine:
         standard_response: str,
         deviation_tolerance: str = "minimal",
         model: str = "gpt-3.5-turbo",
-        max_tokens: int = 800
+        max_tokens: int = 800,
+        on_token: Optional[Callable[[str], None]] = None
     ) -> str:
-        """Generate a personalized response based on standard template and customer inquiry"""
+        """Generate a personalized response based on standard template and customer inquiry
         
-        tolerance_config = self.deviation_tolerance_settings.get(
-            deviation_tolerance, 
-            self.deviation_tolerance_settings["minimal"]
-        )
+        The response is streamed; on_token, if given, is called with each piece of
+        text as it arrives so callers can display it before generation finishes.
+        """
+        
+        cache_key = _response_cache_key(model, max_tokens, deviation_tolerance, standard_response, customer_inquiry)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            if on_token:
+                on_token(cached)
+            return cached
+        
+        messages = self.build_generation_messages(customer_inquiry, standard_response, deviation_tolerance)
+        
+        try:
+            stream = self._call_with_retry(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=0.7,
+                stream=True
+            )
+            
+            parts = []
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    if on_token:
+                        on_token(delta)
+            generated_response = "".join(parts).strip()
+            
+        except Exception as e:
+            raise Exception(f"Error generating communication: {str(e)}") from e
+        
+        self._store_cached(cache_key, generated_response)
+        return generated_response
+    
+    def _call_with_retry(self, **kwargs) -> Any:
+        """Create a chat completion, pacing with the rate limiter and retrying transient errors"""
+        # Disable the SDK's own retries so every attempt goes through the rate limiter
+        client = self.client.with_options(max_retries=0)
+        estimated_tokens = _estimate_tokens(kwargs["messages"], kwargs.get("max_tokens", 0))
+        for attempt in range(MAX_RETRIES + 1):
+            self.rate_limiter.acquire(estimated_tokens)
+            try:
+                raw_response = client.chat.completions.with_raw_response.create(**kwargs)
+            except Exception as e:
+                if attempt == MAX_RETRIES or not _is_retryable(e):
+                    raise
+                time.sleep(_retry_delay(attempt))
+                continue
+            
+            self.rate_limiter.update_from_headers(raw_response.headers)
+            return raw_response.parse()
+    
+    def generate_personalized_responses_batch(
+        self,
+        requests: Dict[str, Dict[str, str]],
+        model: str = "gpt-3.5-turbo",
+        max_tokens: int = 800,
+        poll_interval: float = 30.0
+    ) -> Dict[str, str]:
+        """Generate many personalized responses through the OpenAI Batch API
         
-        prompt = f"""
-        Customer Inquiry: {customer_inquiry}
+        Each request maps a custom id to generate_personalized_response keyword
+        arguments (customer_inquiry, standard_response, deviation_tolerance).
+        Memoized responses are returned without being submitted. Requests that
+        fail inside the batch, or do not finish before it expires or is cancelled,
+        are left out of the returned mapping.
+        """
+        responses = {}
+        pending = {}
+        for custom_id, request in requests.items():
+            deviation_tolerance = request.get("deviation_tolerance", "minimal")
+            cache_key = _response_cache_key(
+                model, max_tokens, deviation_tolerance,
+                request["standard_response"], request["customer_inquiry"]
+            )
+            cached = self._get_cached(cache_key)
+            if cached is not None:
+                responses[custom_id] = cached
+                continue
+            
+            pending[custom_id] = (cache_key, {
+                "model": model,
+                "messages": self.build_generation_messages(
+                    request["customer_inquiry"], request["standard_response"], deviation_tolerance
+                ),
+                "max_tokens": max_tokens,
+                "temperature": 0.7
+            })
         
-        Organization's Standard Response Template:
-        {standard_response}
+        if pending:
+            completions = self._run_chat_batch(
+                {custom_id: body for custom_id, (_, body) in pending.items()}, poll_interval
+            )
+            for custom_id, content in completions.items():
+                generated_response = content.strip()
+                self._store_cached(pending[custom_id][0], generated_response)
+                responses[custom_id] = generated_response
         
-        Deviation Guidelines: {tolerance_config['instruction']}
+        return responses
+    
+    def _run_chat_batch(self, bodies: Dict[str, Dict[str, Any]], poll_interval: float) -> Dict[str, str]:
+        """Submit chat completion bodies as one batch job and wait for the message contents
         
-        Using the standard response above as your base template, generate a personalized response that addresses the specific customer inquiry while staying within the allowed deviation tolerance. Maintain the organization's professional tone and include all required corporate elements.
+        Only requests that produced text content are returned.
         """
+        lines = [
+            json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body
+            })
+            for custom_id, body in bodies.items()
+        ]
         
         try:
-            print(prompt)
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are a corporate customer service representative. You MUST use the provided standard response as your base template and stay within the specified deviation tolerance. Personalize the standard response to address the specific customer inquiry while maintaining the organization's approved language, tone, and structure. Do not deviate beyond the allowed percentage."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_tokens,
-                temperature=0.7
+            input_file = self.client.files.create(
+                file=("batch_input.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch"
+            )
+            batch = self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
             )
+            while batch.status not in BATCH_TERMINAL_STATUSES:
+                time.sleep(poll_interval)
+                batch = self.client.batches.retrieve(batch.id)
             
-            return response.choices[0].message.content.strip()
+            if batch.status == "failed":
+                raise Exception(f"Batch {batch.id} ended with status '{batch.status}'")
+            if batch.status != "completed":
+                # Expired and cancelled batches still hold the finished requests, which are billed
+                logger.warning("Batch %s ended with status '%s'; keeping finished requests", batch.id, batch.status)
+            if not batch.output_file_id:
+                return {}
+            output = self.client.files.content(batch.output_file_id).text
             
         except Exception as e:
-            raise Exception(f"Error generating communication: {str(e)}")
+            raise Exception(f"Error running batch generation: {str(e)}") from e
+        
+        contents = {}
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                continue
+            choices = (response.get("body") or {}).get("choices") or []
+            content = (choices[0].get("message") or {}).get("content") if choices else None
+            # Refusals and content-filtered outputs have no text content
+            if not isinstance(content, str):
+                continue
+            contents[record["custom_id"]] = content
+        return contents
+    
+    def _get_embedding_model(self):
+        """Load the local sentence embedding model on first use"""
+        with self._embedding_lock:
+            if self._embedding_model is None:
+                from sentence_transformers import SentenceTransformer
+                self._embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        return self._embedding_model
     
-    def calculate_deviation_percentage(self, generated_response: str, standard_response: str) -> float:
-        """Calculate how much the generated response deviates from the standard response"""
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as unit-length vectors so their dot product is the cosine similarity
+        
+        Texts embedded before are served from the embedding cache; only new texts
+        are run through the model.
+        """
+        return self.embedding_cache.embed(texts, self._encode, EMBEDDING_MODEL_NAME)
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Run texts through the local embedding model"""
+        return self._get_embedding_model().encode(
+            texts, batch_size=EMBEDDING_BATCH_SIZE, normalize_embeddings=True, convert_to_numpy=True
+        )
+    
+    def calculate_deviation_percentage(self, generated_response: str, standard_response: str) -> Optional[float]:
+        """Calculate how much the generated response deviates from the standard response
+        
+        Deviation is the cosine distance between local sentence embeddings of the
+        two responses, scaled to 0-100%. 0% means identical, 100% means unrelated.
+        Returns None when the embedding model is unavailable.
+        """
+        cache_key = _cache_key("deviation", EMBEDDING_MODEL_NAME, standard_response, generated_response)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            comparison_prompt = f"""
-            Compare these two responses and calculate the percentage of deviation from the standard response.
-            Consider differences in:
-            - Content structure and organization
-            - Tone and language style
-            - Information completeness
-            - Professional formality
-            - Specific details and procedures
+            vectors = self.embed_texts([standard_response, generated_response])
+            deviation = float(1 - np.dot(vectors[0], vectors[1])) * 100
+            deviation = min(max(deviation, 0.0), 100.0)
             
-            Standard Response:
-            {standard_response}
+        except Exception as e:
+            logger.warning("Error calculating deviation: %s", e)
+            return None
+        
+        self._store_cached(cache_key, deviation)
+        return deviation
+    
+    def calculate_deviation_percentages(self, pairs: List[Tuple[str, str]]) -> List[Optional[float]]:
+        """Calculate deviation for many (generated_response, standard_response) pairs at once
+        
+        All texts are embedded in one batched call and every pair is scored with a
+        single vectorized row-wise dot product. Every deviation is None when the
+        embedding model is unavailable.
+        """
+        if not pairs:
+            return []
+        
+        try:
+            # Interleave as [standard_0, generated_0, standard_1, generated_1, ...]
+            texts = [
+                text
+                for generated_response, standard_response in pairs
+                for text in (standard_response, generated_response)
+            ]
+            vectors = self.embed_texts(texts)
+            similarities = np.einsum('ij,ij->i', vectors[0::2], vectors[1::2])
+            deviations = np.clip((1 - similarities) * 100, 0.0, 100.0)
             
-            Generated Response:
-            {generated_response}
+        except Exception as e:
+            logger.warning("Error calculating deviation: %s", e)
+            return [None] * len(pairs)
+        
+        return [float(deviation) for deviation in deviations]
+    
+    def get_deviation_tolerance_limit(self, tolerance: str) -> int:
+        """Get the maximum allowed deviation percentage for a tolerance level"""
+        return _TOLERANCE.get(tolerance, _DEFAULT_TOLERANCE)[0]
+    
+    def _get_cached(self, key: str) -> Optional[Any]:
+        """Look up a memoized result in memory, then in the persistent cache"""
+        with self._cache_lock:
+            if key in self._response_cache:
+                self._response_cache.move_to_end(key)
+                return self._response_cache[key]
             
-            Provide ONLY a numeric percentage (0-100) representing how much the generated response deviates from the standard.
-            0% means identical, 100% means completely different.
-            """
+            if not self.cache_path:
+                return None
+            try:
+                with shelve.open(self.cache_path) as db:
+                    value = db.get(key)
+            except (OSError, *dbm.error) as e:
+                logger.warning("Error reading response cache: %s", e)
+                return None
             
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are an expert text comparison analyst. Provide only the numeric percentage of deviation."
-                    },
-                    {"role": "user", "content": comparison_prompt}
-                ],
-                max_tokens=50,
-                temperature=0.1
+            if value is not None:
+                self._remember(key, value)
+            return value
+    
+    def _store_cached(self, key: str, value: Any):
+        """Memoize a result in memory and in the persistent cache
+        
+        The persistent cache is capped at RESPONSE_CACHE_SIZE entries like the
+        in-memory one, dropping the oldest writes first.
+        """
+        with self._cache_lock:
+            self._remember(key, value)
+            if not self.cache_path:
+                return
+            try:
+                with shelve.open(self.cache_path) as db:
+                    order = db.get(_SHELVE_ORDER_KEY)
+                    if order is None:
+                        # Caches written before the cap have no order; adopt their keys as they are
+                        order = [stored for stored in db.keys() if stored != _SHELVE_ORDER_KEY]
+                    if key in order:
+                        order.remove(key)
+                    order.append(key)
+                    db[key] = value
+                    
+                    while len(order) > RESPONSE_CACHE_SIZE:
+                        oldest = order.pop(0)
+                        if oldest in db:
+                            del db[oldest]
+                    db[_SHELVE_ORDER_KEY] = order
+            except (OSError, *dbm.error) as e:
+                logger.warning("Error writing response cache: %s", e)
+    
+    def _remember(self, key: str, value: Any):
+        """Keep a result in the bounded in-memory cache"""
+        self._response_cache[key] = value
+        self._response_cache.move_to_end(key)
+        while len(self._response_cache) > RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+    
+    def clear_cache(self):
+        """Forget all memoized results, including the persistent cache"""
+        with self._cache_lock:
+            self._response_cache.clear()
+            if self.cache_path:
+                try:
+                    with shelve.open(self.cache_path, flag='n'):
+                        pass
+                except (OSError, *dbm.error) as e:
+                    logger.warning("Error clearing response cache: %s", e)
+
+
+class AsyncCommunicationEngine:
+    """Non-blocking counterpart of CommunicationEngine for concurrent generation
+    
+    Shares the wrapped engine's prompts, caches and embedding model so sync and
+    async calls see the same memoized results.
+    """
+    
+    def __init__(self, engine: CommunicationEngine):
+        self.engine = engine
+        self._async_client = None
+        self._async_client_loop = None
+        self._sessions = 0
+    
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncOpenAI]:
+        """Share one pooled AsyncOpenAI client across the calls made inside the block
+        
+        Sessions nest; the client and its connections are closed when the
+        outermost session exits.
+        """
+        # Pooled connections cannot outlive their loop, so each asyncio.run gets its own pool
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            self._async_client = AsyncOpenAI(
+                api_key=self.engine.client.api_key,
+                http_client=httpx.AsyncClient(http2=True, limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT)
             )
+            self._async_client_loop = loop
+            self._sessions = 0
+        
+        client = self._async_client
+        self._sessions += 1
+        try:
+            yield client
+        finally:
+            self._sessions -= 1
+            if self._sessions == 0 and self._async_client is client:
+                self._async_client = None
+                self._async_client_loop = None
+                await client.close()
+    
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Get the AsyncOpenAI client of the session open on the running event loop"""
+        if self._async_client is None or self._async_client_loop is not asyncio.get_running_loop():
+            raise RuntimeError("The async client is only available inside session()")
+        return self._async_client
+    
+    async def generate_personalized_response(
+        self,
+        customer_inquiry: str,
+        standard_response: str,
+        deviation_tolerance: str = "minimal",
+        model: str = "gpt-3.5-turbo",
+        max_tokens: int = 800
+    ) -> str:
+        """Generate a personalized response without blocking the event loop"""
+        
+        cache_key = _response_cache_key(model, max_tokens, deviation_tolerance, standard_response, customer_inquiry)
+        # The memo may hit the shelve on disk, so keep it off the event loop
+        cached = await asyncio.to_thread(self.engine._get_cached, cache_key)
+        if cached is not None:
+            return cached
+        
+        messages = self.engine.build_generation_messages(customer_inquiry, standard_response, deviation_tolerance)
+        
+        try:
+            async with self.session():
+                response = await self._call_with_retry(
+                    model=model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=0.7
+                )
             
-            # Extract percentage from response
-            result = response.choices[0].message.content.strip()
-            percentage_match = re.search(r'(\d+(?:\.\d+)?)', result)
-            if percentage_match:
-                return float(percentage_match.group(1))
-            return 0.0
+            generated_response = response.choices[0].message.content.strip()
             
         except Exception as e:
-            print(f"Error calculating deviation: {e}")
-            return 0.0
+            raise Exception(f"Error generating communication: {str(e)}") from e
+        
+        await asyncio.to_thread(self.engine._store_cached, cache_key, generated_response)
+        return generated_response
+    
+    async def _call_with_retry(self, **kwargs) -> Any:
+        """Create a chat completion, pacing with the shared rate limiter and retrying transient errors"""
+        # Disable the SDK's own retries so every attempt goes through the rate limiter
+        client = self.async_client.with_options(max_retries=0)
+        rate_limiter = self.engine.rate_limiter
+        estimated_tokens = _estimate_tokens(kwargs["messages"], kwargs.get("max_tokens", 0))
+        for attempt in range(MAX_RETRIES + 1):
+            await rate_limiter.acquire_async(estimated_tokens)
+            try:
+                raw_response = await client.chat.completions.with_raw_response.create(**kwargs)
+            except Exception as e:
+                if attempt == MAX_RETRIES or not _is_retryable(e):
+                    raise
+                await asyncio.sleep(_retry_delay(attempt))
+                continue
+            
+            rate_limiter.update_from_headers(raw_response.headers)
+            return raw_response.parse()
+    
+    async def calculate_deviation_percentage(self, generated_response: str, standard_response: str) -> Optional[float]:
+        """Calculate deviation in a worker thread so local embedding does not block the event loop"""
+        return await asyncio.to_thread(
+            self.engine.calculate_deviation_percentage, generated_response, standard_response
+        )
     
     def get_deviation_tolerance_limit(self, tolerance: str) -> int:
         """Get the maximum allowed deviation percentage for a tolerance level"""
-        return self.deviation_tolerance_settings.get(tolerance, self.deviation_tolerance_settings["minimal"])["limit"]
\ No newline at end of file
+        return self.engine.get_deviation_tolerance_limit(tolerance)
\ No newline at end of file
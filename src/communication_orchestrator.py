@@ -4,21 +4,39 @@ Communication Orchestrator Module
 Main orchestrator that coordinates all components of the templated communication system.
 """
 
-from typing import Optional
+import asyncio
+import os
+from typing import List, Optional
 from .config_manager import ConfigManager
-from .communication_engine import CommunicationEngine
-from .response_processor import ResponseProcessor
+from .communication_engine import AsyncCommunicationEngine, CommunicationEngine
+from .embedding_cache import EmbeddingCache
+from .response_processor import ResponseProcessor, SemanticCache
 from .user_interface import UserInterface
 
 
+SEMANTIC_CACHE_FILENAME = ".semantic_cache.pkl"
+RESPONSE_CACHE_FILENAME = ".response_cache"
+EMBEDDING_CACHE_FILENAME = ".embedding_cache.sqlite3"
+
+
 class CommunicationOrchestrator:
     """Main orchestrator for the templated communication system"""
     
-    def __init__(self, api_key: Optional[str] = None, base_path: str = "."):
+    def __init__(self, api_key: Optional[str] = None, base_path: str = ".", semantic_cache: bool = False):
         # Initialize core components
         self.config_manager = ConfigManager(base_path)
-        self.communication_engine = CommunicationEngine(api_key)
-        self.response_processor = ResponseProcessor(self.config_manager, self.communication_engine)
+        self.communication_engine = CommunicationEngine(
+            api_key,
+            cache_path=os.path.join(base_path, RESPONSE_CACHE_FILENAME),
+            embedding_cache=EmbeddingCache(os.path.join(base_path, EMBEDDING_CACHE_FILENAME))
+        )
+        self.response_processor = ResponseProcessor(
+            self.config_manager,
+            self.communication_engine,
+            # Reusing responses across similar inquiries is opt-in
+            SemanticCache(os.path.join(base_path, SEMANTIC_CACHE_FILENAME)) if semantic_cache else None,
+            AsyncCommunicationEngine(self.communication_engine)
+        )
         self.user_interface = UserInterface(self.config_manager)
     
     def run(self):
@@ -53,22 +71,26 @@ class CommunicationOrchestrator:
             template_fields = self.response_processor.get_template_fields(selected_template)
             customer_data = self.user_interface.collect_customer_data(template_fields)
             
-            # Generate response
+            # Generate response, displaying it as it streams in
+            self.user_interface.display_response_header(company_info, deviation_tolerance)
             result = self.response_processor.generate_response(
                 template_type=selected_template,
                 customer_inquiry=customer_inquiry,
                 customer_data=customer_data,
                 company_info=company_info,
-                deviation_tolerance=deviation_tolerance
+                deviation_tolerance=deviation_tolerance,
+                on_token=self.user_interface.display_token
             )
             
             # Display results
-            self.user_interface.display_response_result(result, company_info)
+            self.user_interface.display_response_result(result, company_info, streamed=True)
             
         except KeyboardInterrupt:
             print("\n\nOperation cancelled by user.")
         except Exception as e:
             self.user_interface.display_error(str(e))
+        finally:
+            self._flush_caches()
     
     def generate_single_response(
         self,
@@ -93,7 +115,68 @@ class CommunicationOrchestrator:
             return result
             
         except Exception as e:
-            raise Exception(f"Error generating response: {str(e)}")
+            raise Exception(f"Error generating response: {str(e)}") from e
+    
+    def generate_multiple_responses(self, requests: List[dict], max_concurrency: int = 16) -> List[dict]:
+        """Generate responses for many inquiries concurrently (for API usage)
+        
+        Each request is a dict of generate_single_response keyword arguments.
+        Results are returned in the same order as the requests; a request that
+        fails gets a result containing only an "error" message.
+        """
+        try:
+            inquiries = [self._build_inquiry(request) for request in requests]
+            
+            return asyncio.run(
+                self.response_processor.generate_response_batch(inquiries, max_concurrency)
+            )
+            
+        except Exception as e:
+            raise Exception(f"Error generating responses: {str(e)}") from e
+        finally:
+            # Persist outside the event loop so disk writes never stall it
+            self._flush_caches()
+    
+    def generate_batch(self, requests: List[dict], poll_interval: float = 30.0) -> List[dict]:
+        """Generate responses for many inquiries with the OpenAI Batch API (for offline runs)
+        
+        Each request is a dict of generate_single_response keyword arguments plus an
+        optional "id". Batch jobs are cheaper but may take up to 24 hours; this call
+        blocks until the job finishes. Results are returned in request order and
+        carry the request id, or the request index when no id is given.
+        """
+        try:
+            # Key the batch by position so duplicate or non-string ids cannot collide
+            inquiries = {
+                str(index): self._build_inquiry(request)
+                for index, request in enumerate(requests)
+            }
+            
+            results = self.response_processor.generate_offline_batch(inquiries, poll_interval)
+            return [
+                {"id": request.get("id", index), **results[str(index)]}
+                for index, request in enumerate(requests)
+            ]
+            
+        except Exception as e:
+            raise Exception(f"Error generating batch: {str(e)}") from e
+    
+    def _flush_caches(self):
+        """Persist the semantic cache, if enabled"""
+        if self.response_processor.semantic_cache is not None:
+            self.response_processor.semantic_cache.flush()
+    
+    def _build_inquiry(self, request: dict) -> dict:
+        """Turn a generate_single_response style request into response processor arguments"""
+        return {
+            "template_type": request["template_type"],
+            "customer_inquiry": request["customer_inquiry"],
+            "customer_data": request.get("customer_data") or {},
+            "company_info": self.config_manager.get_department_info(
+                request.get("department", "customer_service")
+            ),
+            "deviation_tolerance": request.get("deviation_tolerance", "minimal")
+        }
     
     def get_available_templates(self) -> list:
         """Get list of available template types"""
@@ -7,7 +7,184 @@ standard responses, and company information.
 
 import json
 import os
-from typing import Dict, Any, Optional
+import pickle
+import re
+import tempfile
+from collections.abc import Mapping
+from typing import Callable, Dict, Any, Iterator, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library parser
+    orjson = None
+
+
+# Parsed configs shared by all ConfigManager instances, keyed by file path, cache kind and modification time
+_CONFIG_CACHE: Dict[Tuple[str, str, int], Any] = {}
+
+# Byte-level JSON tokens for indexing a file without decoding its values
+_JSON_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_JSON_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_JSON_SCALAR = re.compile(rb"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|true|false|null")
+_JSON_STRUCTURE = re.compile(rb'["\[\]{}]')
+
+# Times a lazily read value is re-read after its file changes mid-read
+LAZY_READ_ATTEMPTS = 3
+
+
+def _parse_json(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_error(message: str, data: bytes, position: int) -> json.JSONDecodeError:
+    """Build a decode error for a byte position, reporting the right line and column"""
+    prefix = data[:position].decode("utf-8", "replace")
+    return json.JSONDecodeError(message, prefix, len(prefix))
+
+
+def _skip_json_value(data: bytes, start: int) -> int:
+    """Find the end of the JSON value starting at a byte offset without decoding it
+    
+    Containers are matched by bracket depth only; their contents are validated
+    when the value itself is decoded.
+    """
+    first = data[start:start + 1]
+    if first == b'"':
+        match = _JSON_STRING.match(data, start)
+        if match is None:
+            raise _json_error("Unterminated string", data, start)
+        return match.end()
+    
+    if first in (b"{", b"["):
+        depth = 0
+        position = start
+        while True:
+            match = _JSON_STRUCTURE.search(data, position)
+            if match is None:
+                raise _json_error("Unterminated container", data, start)
+            token = match.group()
+            if token == b'"':
+                string = _JSON_STRING.match(data, match.start())
+                if string is None:
+                    raise _json_error("Unterminated string", data, match.start())
+                position = string.end()
+                continue
+            depth += 1 if token in (b"{", b"[") else -1
+            position = match.end()
+            if depth == 0:
+                return position
+    
+    match = _JSON_SCALAR.match(data, start)
+    if match is None:
+        raise _json_error("Expecting value", data, start)
+    return match.end()
+
+
+def _index_json_object(data: bytes) -> Dict[str, Tuple[int, int]]:
+    """Find the byte range of each top-level value in a JSON object
+    
+    Only the keys are decoded, so building the index costs a single scan of the file.
+    """
+    offsets = {}
+    
+    index = _JSON_WHITESPACE.match(data, 0).end()
+    if data[index:index + 1] != b"{":
+        raise _json_error("Expecting '{'", data, index)
+    index = _JSON_WHITESPACE.match(data, index + 1).end()
+    
+    while data[index:index + 1] != b"}":
+        key_match = _JSON_STRING.match(data, index)
+        if key_match is None:
+            raise _json_error("Expecting property name enclosed in double quotes", data, index)
+        try:
+            key = json.loads(key_match.group())
+        except ValueError:
+            raise _json_error("Invalid property name", data, index)
+        index = _JSON_WHITESPACE.match(data, key_match.end()).end()
+        if data[index:index + 1] != b":":
+            raise _json_error("Expecting ':' delimiter", data, index)
+        
+        start = _JSON_WHITESPACE.match(data, index + 1).end()
+        end = _skip_json_value(data, start)
+        offsets[key] = (start, end)
+        
+        index = _JSON_WHITESPACE.match(data, end).end()
+        if data[index:index + 1] == b",":
+            index = _JSON_WHITESPACE.match(data, index + 1).end()
+            if data[index:index + 1] != b'"':
+                raise _json_error("Expecting property name enclosed in double quotes", data, index)
+        elif data[index:index + 1] != b"}":
+            raise _json_error("Expecting ',' delimiter", data, index)
+    
+    if _JSON_WHITESPACE.match(data, index + 1).end() != len(data):
+        raise _json_error("Extra data", data, index + 1)
+    return offsets
+
+
+class LazyJSONObject(Mapping):
+    """Read-only mapping over a top-level JSON object that decodes each value on first access
+    
+    Only an index of value byte ranges is kept in memory; the file is reindexed
+    automatically when it changes on disk, including between indexing and a read.
+    """
+    
+    def __init__(self, config_manager: "ConfigManager", filename: str):
+        self._config_manager = config_manager
+        self._filename = filename
+        self._filepath = os.path.join(config_manager.base_path, filename)
+        self._indexed_offsets = None
+        self._indexed_mtime = None
+        self._values: Dict[str, Any] = {}
+    
+    def _offsets(self) -> Dict[str, Tuple[int, int]]:
+        """Get the current value index, dropping decoded values if the file changed"""
+        offsets, mtime = self._config_manager._load_json_index(self._filename)
+        if offsets is not self._indexed_offsets:
+            self._indexed_offsets = offsets
+            self._indexed_mtime = mtime
+            self._values = {}
+        return offsets
+    
+    def __getitem__(self, key: str) -> Any:
+        for _ in range(LAZY_READ_ATTEMPTS):
+            offsets = self._offsets()
+            if key in self._values:
+                return self._values[key]
+            
+            start, end = offsets[key]
+            try:
+                with open(self._filepath, 'rb') as f:
+                    f.seek(start)
+                    data = f.read(end - start)
+                    changed = os.fstat(f.fileno()).st_mtime_ns != self._indexed_mtime
+            except FileNotFoundError:
+                raise FileNotFoundError(
+                    f"Config file '{self._filename}' not found in {self._config_manager.base_path}"
+                )
+            if changed:
+                # The offsets belong to an older version of the file; reindex and read again
+                continue
+            
+            try:
+                value = _parse_json(data)
+            except ValueError as e:
+                raise ValueError(f"Invalid JSON in config file '{self._filename}': {str(e)}")
+            self._values[key] = value
+            return value
+        
+        raise ValueError(f"Config file '{self._filename}' kept changing while it was read")
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self._offsets()
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._offsets())
+    
+    def __len__(self) -> int:
+        return len(self._offsets())
 
 
 class ConfigManager:
@@ -20,15 +197,74 @@ class ConfigManager:
         self._company_config = None
     
     def _load_json_file(self, filename: str) -> Dict[str, Any]:
-        """Load and parse a JSON configuration file"""
-        filepath = os.path.join(self.base_path, filename)
+        """Load and parse a JSON configuration file
+        
+        Parsed configs are cached in memory and in a sibling .pkl file, both
+        invalidated when the JSON file's modification time changes.
+        """
+        return self._load_cached(filename, ".pkl", _parse_json)[0]
+    
+    def _load_json_index(self, filename: str) -> Tuple[Dict[str, Tuple[int, int]], int]:
+        """Load the byte range index of a JSON object's top-level values and the mtime it belongs to
+        
+        Cached like parsed configs, in a sibling .index.pkl file.
+        """
+        return self._load_cached(filename, ".index.pkl", _index_json_object)
+    
+    def _load_cached(self, filename: str, suffix: str, build: Callable[[bytes], Any]) -> Tuple[Any, int]:
+        """Build a value from a config file's contents, cached by the file's modification time
+        
+        Returns the value together with the modification time it was built from.
+        """
+        filepath = os.path.abspath(os.path.join(self.base_path, filename))
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            mtime = os.stat(filepath).st_mtime_ns
         except FileNotFoundError:
             raise FileNotFoundError(f"Config file '{filename}' not found in {self.base_path}")
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON in config file '{filename}': {str(e)}")
+        
+        cache_key = (filepath, suffix, mtime)
+        if cache_key in _CONFIG_CACHE:
+            return _CONFIG_CACHE[cache_key], mtime
+        
+        pickle_path = os.path.splitext(filepath)[0] + suffix
+        config = self._load_pickled_config(pickle_path, mtime)
+        if config is None:
+            try:
+                with open(filepath, 'rb') as f:
+                    config = build(f.read())
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Config file '{filename}' not found in {self.base_path}")
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON in config file '{filename}': {str(e)}")
+            self._save_pickled_config(pickle_path, mtime, config)
+        
+        # Drop entries for older versions of the same file
+        for stale_key in [key for key in _CONFIG_CACHE if key[:2] == (filepath, suffix)]:
+            del _CONFIG_CACHE[stale_key]
+        _CONFIG_CACHE[cache_key] = config
+        return config, mtime
+    
+    def _load_pickled_config(self, pickle_path: str, mtime: int) -> Optional[Any]:
+        """Load a cached config if it was pickled from the current JSON file"""
+        try:
+            with open(pickle_path, 'rb') as f:
+                cached = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        
+        if not isinstance(cached, dict) or cached.get("mtime") != mtime:
+            return None
+        return cached.get("config")
+    
+    def _save_pickled_config(self, pickle_path: str, mtime: int, config: Any):
+        """Atomically pickle a config next to its JSON file"""
+        try:
+            with tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(pickle_path), delete=False) as f:
+                pickle.dump({"mtime": mtime, "config": config}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f.name, pickle_path)
+        except OSError:
+            # The pickle is only an optimization; read-only config directories still work
+            pass
     
     @property
     def templates(self) -> Dict[str, str]:
@@ -38,10 +274,14 @@ class ConfigManager:
         return self._templates
     
     @property
-    def standard_responses(self) -> Dict[str, str]:
-        """Get standard responses configuration"""
+    def standard_responses(self) -> Mapping:
+        """Get standard responses configuration
+        
+        Responses are decoded individually on first access, so only the templates
+        actually used are parsed and held in memory.
+        """
         if self._standard_responses is None:
-            self._standard_responses = self._load_json_file("standard_responses.json")
+            self._standard_responses = LazyJSONObject(self, "standard_responses.json")
         return self._standard_responses
     
     @property
@@ -90,7 +330,7 @@ class ConfigManager:
         }
     
     def reload_configs(self):
-        """Reload all configuration files"""
+        """Reload all configuration files, re-parsing only those modified since they were cached"""
         self._templates = None
         self._standard_responses = None
         self._company_config = None
\ No newline at end of file
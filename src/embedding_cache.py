@@ -0,0 +1,139 @@
+"""
+Embedding Cache Module
+
+Content-hash keyed cache of text embeddings so repeated texts skip the model.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+
+MEMORY_CACHE_SIZE = 4096
+SQLITE_MAX_PARAMETERS = 500
+
+
+def _text_key(model_name: str, text: str) -> bytes:
+    """Hash a text into its cache key; vectors from different models never share a key"""
+    hasher = hashlib.blake2b(model_name.encode("utf-8"), digest_size=16)
+    hasher.update(b"\0")
+    hasher.update(text.encode("utf-8"))
+    return hasher.digest()
+
+
+class EmbeddingCache:
+    """Caches text embeddings in memory and, optionally, in a SQLite database
+    
+    Vectors are stored on disk as float16 to halve their size; that precision is
+    ample for the cosine similarities computed from them.
+    """
+    
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        if db_path:
+            self._execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+    
+    def embed(
+        self,
+        texts: List[str],
+        encode: Callable[[List[str]], np.ndarray],
+        model_name: str
+    ) -> np.ndarray:
+        """Embed texts with the named model, running encode only on the texts that are not cached yet"""
+        keys = [_text_key(model_name, text) for text in texts]
+        vectors = self._get_many(keys)
+        
+        uncached = self.find_uncached_texts(texts, keys, vectors)
+        if uncached:
+            new_vectors = encode(list(uncached.values()))
+            computed = dict(zip(uncached.keys(), new_vectors))
+            self._put_many(computed)
+            vectors.update(computed)
+        
+        return np.stack([vectors[key] for key in keys])
+    
+    @staticmethod
+    def find_uncached_texts(
+        texts: List[str],
+        keys: List[bytes],
+        vectors: Dict[bytes, np.ndarray]
+    ) -> "OrderedDict[bytes, str]":
+        """Get the distinct texts missing from the cached vectors, keyed by cache key"""
+        uncached = OrderedDict()
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                uncached.setdefault(key, text)
+        return uncached
+    
+    def clear(self):
+        """Remove all cached embeddings"""
+        with self._lock:
+            self._memory.clear()
+        if self.db_path:
+            self._execute("DELETE FROM embeddings")
+    
+    def _get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Look up vectors in memory, then in the database"""
+        vectors = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    vectors[key] = self._memory[key]
+        
+        missing = list({key for key in keys if key not in vectors})
+        if missing and self.db_path:
+            found = {}
+            # Stay below SQLite's limit on the number of bound parameters
+            for start in range(0, len(missing), SQLITE_MAX_PARAMETERS):
+                chunk = missing[start:start + SQLITE_MAX_PARAMETERS]
+                rows = self._execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                for key, vector in rows:
+                    found[bytes(key)] = np.frombuffer(vector, dtype=np.float16).astype(np.float32)
+            self._remember(found)
+            vectors.update(found)
+        return vectors
+    
+    def _put_many(self, vectors: Dict[bytes, np.ndarray]):
+        """Store vectors in memory and in the database"""
+        self._remember(vectors)
+        if self.db_path:
+            self._execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float16).tobytes()) for key, vector in vectors.items()],
+                many=True
+            )
+    
+    def _remember(self, vectors: Dict[bytes, np.ndarray]):
+        """Keep vectors in the bounded in-memory cache"""
+        with self._lock:
+            for key, vector in vectors.items():
+                self._memory[key] = vector
+                self._memory.move_to_end(key)
+            while len(self._memory) > MEMORY_CACHE_SIZE:
+                self._memory.popitem(last=False)
+    
+    def _execute(self, sql: str, parameters=(), many: bool = False) -> list:
+        """Run a statement on a short-lived connection, ignoring database errors"""
+        try:
+            with closing(sqlite3.connect(self.db_path)) as connection:
+                with connection:
+                    if many:
+                        connection.executemany(sql, parameters)
+                        return []
+                    return connection.execute(sql, parameters).fetchall()
+        except sqlite3.Error as e:
+            print(f"Error accessing embedding cache: {e}")
+            return []
\ No newline at end of file
@@ -0,0 +1,19 @@
+"""
+Fields Module
+
+Naming helpers for customer data fields, shared by response processing and the user interface.
+"""
+
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def field_display_name(field: str) -> str:
+    """Convert a data field name such as 'customer_name' to its display name 'Customer Name'"""
+    return field.replace('_', ' ').title()
+
+
+@lru_cache(maxsize=256)
+def field_placeholder(field: str) -> str:
+    """Convert a data field name such as 'customer_name' to its '[Customer Name]' placeholder"""
+    return f"[{field_display_name(field)}]"
@@ -0,0 +1,86 @@
+"""
+Rate Limiter Module
+
+Client-side pacing of OpenAI requests to stay within rate limits.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Mapping, Optional
+
+
+class TokenBucket:
+    """Token bucket limiting requests per minute and tokens per minute
+    
+    Capacity refills continuously. A request may overdraw the bucket; the caller
+    then waits until the debt has been refilled, so bursts are smoothed out rather
+    than rejected. Limits are corrected from the x-ratelimit-* response headers.
+    """
+    
+    def __init__(self, rpm: int = 3500, tpm: int = 90000):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self):
+        """Add the capacity accrued since the last update"""
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._requests = min(float(self.rpm), self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(float(self.tpm), self._tokens + elapsed * self.tpm / 60)
+        self._updated = now
+    
+    def reserve(self, tokens: int) -> float:
+        """Take capacity for one request and return the seconds to wait before sending it"""
+        with self._lock:
+            self._refill()
+            self._requests -= 1
+            self._tokens -= min(tokens, self.tpm)
+            return max(
+                -self._requests * 60 / self.rpm,
+                -self._tokens * 60 / self.tpm,
+                0.0
+            )
+    
+    def acquire(self, tokens: int):
+        """Block until a request of the given size may be sent"""
+        delay = self.reserve(tokens)
+        if delay:
+            time.sleep(delay)
+    
+    async def acquire_async(self, tokens: int):
+        """Wait without blocking the event loop until a request of the given size may be sent"""
+        delay = self.reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+    
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """Adopt the limits and remaining capacity reported by the API"""
+        limit_requests = _parse_int(headers.get("x-ratelimit-limit-requests"))
+        limit_tokens = _parse_int(headers.get("x-ratelimit-limit-tokens"))
+        remaining_requests = _parse_int(headers.get("x-ratelimit-remaining-requests"))
+        remaining_tokens = _parse_int(headers.get("x-ratelimit-remaining-tokens"))
+        
+        with self._lock:
+            self._refill()
+            if limit_requests:
+                self.rpm = limit_requests
+            if limit_tokens:
+                self.tpm = limit_tokens
+            # The server's count already includes requests still in flight from other clients
+            if remaining_requests is not None:
+                self._requests = min(self._requests, float(remaining_requests))
+            if remaining_tokens is not None:
+                self._tokens = min(self._tokens, float(remaining_tokens))
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    """Parse an integer header value, ignoring missing or malformed values"""
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
\ No newline at end of file
@@ -4,15 +4,147 @@ Response Processor Module
 Handles response preparation, placeholder replacement, and analysis.
 """
 
-from typing import Dict, Any, Optional
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import pickle
+import re
+import tempfile
+from types import MappingProxyType
+from typing import Callable, Dict, Any, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+from .fields import field_placeholder
+
+
+# Required customer data fields for each template type
+_TEMPLATE_FIELDS: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "customer_inquiry_response": ("customer_name", "account_number"),
+    "complaint_resolution_letter": ("customer_name", "complaint_number"),
+    "policy_cancellation_response": ("customer_name", "policy_number", "policy_type", "effective_date", "refund_amount"),
+    "claim_processing_update": ("customer_name", "claim_number", "policy_number", "incident_date", "claim_status", "next_steps"),
+    "claim_approval_notification": ("customer_name", "claim_number", "approved_amount", "payment_date", "settlement_details"),
+    "claim_denial_notification": ("customer_name", "claim_number", "policy_number", "denial_reason", "policy_section", "appeal_process"),
+    "billing_inquiry_response": ("customer_name", "account_number", "billing_period", "amount_due", "due_date", "payment_methods"),
+    "premium_adjustment_notice": ("customer_name", "policy_number", "current_premium", "new_premium", "effective_date", "increase_reason"),
+    "coverage_modification_notice": ("customer_name", "policy_number", "coverage_changes", "effective_date", "premium_impact"),
+    "new_customer_welcome": ("customer_name", "policy_number", "agent_name", "agent_contact", "coverage_summary", "important_dates")
+})
+
+_PLACEHOLDER_RE = re.compile(r"\[([A-Za-z][A-Za-z0-9 ]*)\]")
+
+
+SEMANTIC_CACHE_VERSION = 2
+
+
+class SemanticCache:
+    """LRU cache of generated responses for semantically similar customer inquiries
+    
+    Entries are grouped by a key that includes the template type, deviation
+    tolerance and a hash of the exact customer and company data, so a response is
+    only ever reused for the same customer. Within a key, entries are matched on the
+    cosine similarity of unit-length inquiry embeddings. When a cache path is given
+    the entries are pickled to disk by flush(), which also runs at interpreter exit.
+    """
+    
+    def __init__(self, cache_path: Optional[str] = None, threshold: float = 0.92, maxsize: int = 1024):
+        self.cache_path = cache_path
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._entries: List[Tuple[np.ndarray, Tuple[str, ...], Dict[str, Any]]] = []
+        self._dirty = False
+        if cache_path:
+            self._load()
+            atexit.register(self.flush)
+    
+    def lookup(self, embedding: np.ndarray, key: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        """Return the cached result most similar to the embedding, if above threshold"""
+        best_index = None
+        best_similarity = self.threshold
+        for index, (cached_embedding, cached_key, _) in enumerate(self._entries):
+            if cached_key != key:
+                continue
+            similarity = float(np.dot(embedding, cached_embedding))
+            if similarity >= best_similarity:
+                best_index, best_similarity = index, similarity
+        
+        if best_index is None:
+            return None
+        
+        # Move the hit to the end so it is evicted last
+        entry = self._entries.pop(best_index)
+        self._entries.append(entry)
+        return entry[2]
+    
+    def insert(self, embedding: np.ndarray, key: Tuple[str, ...], result: Dict[str, Any]):
+        """Add a result to the cache, evicting the least recently used entries
+        
+        Only memory is updated; call flush() to persist the entries.
+        """
+        self._entries.append((embedding, key, result))
+        if len(self._entries) > self.maxsize:
+            del self._entries[:len(self._entries) - self.maxsize]
+        self._dirty = True
+    
+    def clear(self):
+        """Remove all cached entries"""
+        self._entries = []
+        self._dirty = True
+        self.flush()
+    
+    def flush(self):
+        """Write the cached entries to disk if they changed since the last flush"""
+        if self.cache_path and self._dirty:
+            self._save()
+    
+    def _load(self):
+        """Load cached entries from disk, starting empty if the file is missing, unreadable or outdated"""
+        try:
+            with open(self.cache_path, 'rb') as f:
+                cached = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            cached = None
+        
+        if isinstance(cached, dict) and cached.get("version") == SEMANTIC_CACHE_VERSION:
+            self._entries = cached["entries"][-self.maxsize:]
+        else:
+            # Older cache files matched responses across customers; never reuse them
+            self._entries = []
+            self._dirty = os.path.exists(self.cache_path)
+    
+    def _save(self):
+        """Atomically write cached entries to disk"""
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        try:
+            with tempfile.NamedTemporaryFile('wb', dir=directory, delete=False) as f:
+                pickle.dump(
+                    {"version": SEMANTIC_CACHE_VERSION, "entries": self._entries},
+                    f, protocol=pickle.HIGHEST_PROTOCOL
+                )
+            os.replace(f.name, self.cache_path)
+            self._dirty = False
+        except OSError as e:
+            print(f"Error saving semantic cache: {e}")
 
 
 class ResponseProcessor:
     """Processes and prepares responses for generation"""
     
-    def __init__(self, config_manager, communication_engine):
+    def __init__(
+        self,
+        config_manager,
+        communication_engine,
+        semantic_cache: Optional[SemanticCache] = None,
+        async_communication_engine=None
+    ):
         self.config_manager = config_manager
         self.communication_engine = communication_engine
+        self.async_communication_engine = async_communication_engine
+        # Optional; without a cache every inquiry is generated
+        self.semantic_cache = semantic_cache
     
     def prepare_standard_response(
         self, 
@@ -26,22 +158,49 @@ class ResponseProcessor:
             raise ValueError(f"Template type '{template_type}' not found in standard responses")
         
         standard_response = self.config_manager.standard_responses[template_type]
+        return self.fill_placeholders(standard_response, customer_data, company_info)
+    
+    def fill_placeholders(
+        self,
+        text: str,
+        customer_data: Dict[str, str],
+        company_info: Dict[str, str]
+    ) -> str:
+        """Replace [Field Name] placeholders in text with customer and company data"""
         
-        # Replace customer data placeholders
-        if customer_data:
-            for field, value in customer_data.items():
-                placeholder = f"[{field.replace('_', ' ').title()}]"
-                standard_response = standard_response.replace(placeholder, value)
+        # Customer data takes precedence over company info for the same placeholder
+        mapping = {}
+        for data in (company_info, customer_data):
+            if data:
+                for field, value in data.items():
+                    mapping[field_placeholder(field)] = value
         
-        # Replace company info placeholders
-        if company_info:
-            for field, value in company_info.items():
-                placeholder = f"[{field.replace('_', ' ').title()}]"
-                standard_response = standard_response.replace(placeholder, value)
+        if not mapping:
+            return text
         
-        return standard_response
+        # Single pass over the text regardless of how many fields are provided
+        return _PLACEHOLDER_RE.sub(lambda match: mapping.get(match.group(0), match.group(0)), text)
     
     def generate_response(
+        self,
+        template_type: str,
+        customer_inquiry: str,
+        customer_data: Dict[str, str],
+        company_info: Dict[str, str],
+        deviation_tolerance: str = "minimal",
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """Generate a complete response with analysis
+        
+        on_token, if given, receives the generated response text as it streams in.
+        """
+        generation = self._generate(
+            template_type, customer_inquiry, customer_data, company_info, deviation_tolerance, on_token
+        )
+        inquiry = {"template_type": template_type, "deviation_tolerance": deviation_tolerance}
+        return self._analyze_generations([inquiry], [generation])[0]
+    
+    async def generate_response_async(
         self,
         template_type: str,
         customer_inquiry: str,
@@ -49,31 +208,241 @@ class ResponseProcessor:
         company_info: Dict[str, str],
         deviation_tolerance: str = "minimal"
     ) -> Dict[str, Any]:
-        """Generate a complete response with analysis"""
+        """Generate a complete response with analysis without blocking the event loop"""
+        generation = await self._generate_async(
+            template_type, customer_inquiry, customer_data, company_info, deviation_tolerance
+        )
+        inquiry = {"template_type": template_type, "deviation_tolerance": deviation_tolerance}
+        return (await asyncio.to_thread(self._analyze_generations, [inquiry], [generation]))[0]
+    
+    async def generate_response_batch(
+        self,
+        inquiries: List[Dict[str, Any]],
+        max_concurrency: int = 16
+    ) -> List[Dict[str, Any]]:
+        """Generate responses for many inquiries concurrently
+        
+        Each inquiry is a dict of generate_response keyword arguments. Results are
+        returned in the same order as the inquiries; an inquiry that fails gets a
+        result containing only an "error" message. Deviation is scored for the
+        whole batch at once after all responses are generated.
+        """
+        if self.async_communication_engine is None:
+            raise ValueError("Async generation requires an AsyncCommunicationEngine")
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def generate(inquiry: Dict[str, Any]) -> Tuple[str, str, bool]:
+            async with semaphore:
+                return await self._generate_async(**inquiry)
+        
+        # One client session for the whole batch, so every request reuses the same connection pool.
+        # A failed inquiry must not discard the responses already paid for
+        async with self.async_communication_engine.session():
+            generations = await asyncio.gather(
+                *(generate(inquiry) for inquiry in inquiries), return_exceptions=True
+            )
+        for generation in generations:
+            if isinstance(generation, BaseException) and not isinstance(generation, Exception):
+                raise generation
+        
+        return await asyncio.to_thread(self._analyze_generations, inquiries, generations)
+    
+    def _generate(
+        self,
+        template_type: str,
+        customer_inquiry: str,
+        customer_data: Dict[str, str],
+        company_info: Dict[str, str],
+        deviation_tolerance: str = "minimal",
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> Tuple[str, str, bool]:
+        """Get the standard response, generated response and whether it came from the cache"""
+        
+        # Prepare standard response
+        standard_response = self.prepare_standard_response(
+            template_type, customer_data, company_info
+        )
+        
+        generated_response, remember = self._lookup_semantic_cache(
+            self._embed_inquiry(customer_inquiry),
+            template_type, deviation_tolerance, customer_data, company_info
+        )
+        from_cache = generated_response is not None
+        
+        if from_cache:
+            if on_token:
+                on_token(generated_response)
+        else:
+            # Generate personalized response
+            generated_response = self.communication_engine.generate_personalized_response(
+                customer_inquiry=customer_inquiry,
+                standard_response=standard_response,
+                deviation_tolerance=deviation_tolerance,
+                on_token=on_token
+            )
+            remember(generated_response)
+        
+        return standard_response, generated_response, from_cache
+    
+    async def _generate_async(
+        self,
+        template_type: str,
+        customer_inquiry: str,
+        customer_data: Dict[str, str],
+        company_info: Dict[str, str],
+        deviation_tolerance: str = "minimal"
+    ) -> Tuple[str, str, bool]:
+        """Get the standard response, generated response and whether it came from the cache"""
+        
+        if self.async_communication_engine is None:
+            raise ValueError("Async generation requires an AsyncCommunicationEngine")
         
         # Prepare standard response
         standard_response = self.prepare_standard_response(
             template_type, customer_data, company_info
         )
         
-        # Generate personalized response
-        generated_response = self.communication_engine.generate_personalized_response(
-            customer_inquiry=customer_inquiry,
-            standard_response=standard_response,
-            deviation_tolerance=deviation_tolerance
+        generated_response, remember = self._lookup_semantic_cache(
+            await asyncio.to_thread(self._embed_inquiry, customer_inquiry),
+            template_type, deviation_tolerance, customer_data, company_info
         )
+        from_cache = generated_response is not None
+        
+        if not from_cache:
+            # Generate personalized response
+            generated_response = await self.async_communication_engine.generate_personalized_response(
+                customer_inquiry=customer_inquiry,
+                standard_response=standard_response,
+                deviation_tolerance=deviation_tolerance
+            )
+            remember(generated_response)
+        
+        return standard_response, generated_response, from_cache
+    
+    def generate_offline_batch(
+        self,
+        inquiries: Dict[str, Dict[str, Any]],
+        poll_interval: float = 30.0
+    ) -> Dict[str, Dict[str, Any]]:
+        """Generate responses for many inquiries as one OpenAI Batch API job
         
-        # Calculate deviation
-        deviation_percentage = self.communication_engine.calculate_deviation_percentage(
-            generated_response, standard_response
+        Inquiries map a custom id to generate_response keyword arguments. Inquiries
+        that fail inside the batch get a result containing only an "error" message.
+        """
+        standard_responses = {
+            custom_id: self.prepare_standard_response(
+                inquiry["template_type"], inquiry["customer_data"], inquiry["company_info"]
+            )
+            for custom_id, inquiry in inquiries.items()
+        }
+        
+        generated_responses = self.communication_engine.generate_personalized_responses_batch(
+            {
+                custom_id: {
+                    "customer_inquiry": inquiry["customer_inquiry"],
+                    "standard_response": standard_responses[custom_id],
+                    "deviation_tolerance": inquiry.get("deviation_tolerance", "minimal")
+                }
+                for custom_id, inquiry in inquiries.items()
+            },
+            poll_interval=poll_interval
         )
         
+        generations = [
+            (standard_responses[custom_id], generated_responses[custom_id], False)
+            if custom_id in generated_responses
+            else Exception("Response generation failed in batch")
+            for custom_id in inquiries
+        ]
+        return dict(zip(inquiries, self._analyze_generations(list(inquiries.values()), generations)))
+    
+    def _analyze_generations(
+        self,
+        inquiries: List[Dict[str, Any]],
+        generations: List[Union[Tuple[str, str, bool], Exception]]
+    ) -> List[Dict[str, Any]]:
+        """Score and analyze generated responses in inquiry order
+        
+        Deviation is calculated for all generated responses in one vectorized pass.
+        A failed generation gets a result containing only an "error" message.
+        """
+        succeeded = [
+            index for index, generation in enumerate(generations)
+            if not isinstance(generation, Exception)
+        ]
+        deviation_percentages = dict(zip(succeeded, self.communication_engine.calculate_deviation_percentages([
+            (generations[index][1], generations[index][0]) for index in succeeded
+        ])))
+        
+        results = []
+        for index, (inquiry, generation) in enumerate(zip(inquiries, generations)):
+            if isinstance(generation, Exception):
+                results.append({"error": str(generation)})
+                continue
+            
+            standard_response, generated_response, from_cache = generation
+            results.append(self.analyze_response(
+                inquiry["template_type"], inquiry.get("deviation_tolerance", "minimal"),
+                standard_response, generated_response, deviation_percentages[index], from_cache
+            ))
+        return results
+    
+    def _embed_inquiry(self, customer_inquiry: str) -> Optional[np.ndarray]:
+        """Embed an inquiry for the semantic cache, or skip the model when no cache is configured"""
+        if self.semantic_cache is None:
+            return None
+        return self.communication_engine.embed_texts([customer_inquiry])[0]
+    
+    def _lookup_semantic_cache(
+        self,
+        inquiry_embedding: Optional[np.ndarray],
+        template_type: str,
+        deviation_tolerance: str,
+        customer_data: Dict[str, str],
+        company_info: Dict[str, str]
+    ) -> Tuple[Optional[str], Callable[[str], None]]:
+        """Find the cached response to a similar inquiry with identical customer and company data
+        
+        Returns the cached response, or None on a miss, together with a function
+        that caches a freshly generated response under the same key.
+        """
+        if self.semantic_cache is None or inquiry_embedding is None:
+            return None, lambda generated_response: None
+        
+        # The data hash keeps one customer's response from reaching another
+        data = json.dumps([customer_data or {}, company_info or {}], sort_keys=True)
+        key = (template_type, deviation_tolerance, hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest())
+        
+        def remember(generated_response: str):
+            self.semantic_cache.insert(inquiry_embedding, key, {"generated_response": generated_response})
+        
+        cached = self.semantic_cache.lookup(inquiry_embedding, key)
+        return (cached["generated_response"] if cached is not None else None), remember
+    
+    def analyze_response(
+        self,
+        template_type: str,
+        deviation_tolerance: str,
+        standard_response: str,
+        generated_response: str,
+        deviation_percentage: Optional[float],
+        from_cache: bool = False
+    ) -> Dict[str, Any]:
+        """Analyze compliance of a generated response and build the result
+        
+        A deviation of None, when it could not be calculated, leaves compliance unknown.
+        """
+        
         # Analyze compliance
         max_allowed = self.communication_engine.get_deviation_tolerance_limit(deviation_tolerance)
-        is_compliant = deviation_percentage <= max_allowed
+        is_compliant = deviation_percentage <= max_allowed if deviation_percentage is not None else None
         
         # Determine compliance level
-        if deviation_percentage <= 10:
+        if deviation_percentage is None:
+            compliance_level = "unavailable"
+            compliance_message = "⚠️ Unavailable: Deviation could not be calculated, so compliance is unknown"
+        elif deviation_percentage <= 10:
             compliance_level = "excellent"
             compliance_message = "✅ Excellent: Response closely follows organization standards"
         elif deviation_percentage <= 25:
@@ -95,25 +464,13 @@ class ResponseProcessor:
             "compliance_level": compliance_level,
             "compliance_message": compliance_message,
             "template_type": template_type,
-            "deviation_tolerance": deviation_tolerance
+            "deviation_tolerance": deviation_tolerance,
+            "from_cache": from_cache
         }
     
-    def get_template_fields(self, template_type: str) -> list:
+    def get_template_fields(self, template_type: str) -> Tuple[str, ...]:
         """Get required customer data fields for a template type"""
-        template_fields = {
-            "customer_inquiry_response": ["customer_name", "account_number"],
-            "complaint_resolution_letter": ["customer_name", "complaint_number"],
-            "policy_cancellation_response": ["customer_name", "policy_number", "policy_type", "effective_date", "refund_amount"],
-            "claim_processing_update": ["customer_name", "claim_number", "policy_number", "incident_date", "claim_status", "next_steps"],
-            "claim_approval_notification": ["customer_name", "claim_number", "approved_amount", "payment_date", "settlement_details"],
-            "claim_denial_notification": ["customer_name", "claim_number", "policy_number", "denial_reason", "policy_section", "appeal_process"],
-            "billing_inquiry_response": ["customer_name", "account_number", "billing_period", "amount_due", "due_date", "payment_methods"],
-            "premium_adjustment_notice": ["customer_name", "policy_number", "current_premium", "new_premium", "effective_date", "increase_reason"],
-            "coverage_modification_notice": ["customer_name", "policy_number", "coverage_changes", "effective_date", "premium_impact"],
-            "new_customer_welcome": ["customer_name", "policy_number", "agent_name", "agent_contact", "coverage_summary", "important_dates"]
-        }
-        
-        return template_fields.get(template_type, [])
+        return _TEMPLATE_FIELDS.get(template_type, ())
     
     def format_customer_data(self, customer_data: Dict[str, str]) -> str:
         """Format customer data for display purposes"""
@@ -4,7 +4,9 @@ User Interface Module
 Handles all user interactions, input collection, and output display.
 """
 
-from typing import Dict, List, Tuple, Any
+from typing import Dict, Sequence, Tuple, Any
+
+from .fields import field_display_name, field_placeholder
 
 
 class UserInterface:
@@ -106,7 +108,7 @@ class UserInterface:
         print(f"Selected: {deviation_tolerance.title()} deviation tolerance")
         return deviation_tolerance
     
-    def collect_customer_data(self, template_fields: List[str]) -> Dict[str, str]:
+    def collect_customer_data(self, template_fields: Sequence[str]) -> Dict[str, str]:
         """Collect customer data based on template requirements"""
         if not template_fields:
             return {}
@@ -116,22 +118,35 @@ class UserInterface:
         
         customer_data = {}
         for field in template_fields:
-            field_display = field.replace('_', ' ').title()
-            value = input(f"{field_display}: ").strip()
-            customer_data[field] = value or f"[{field_display}]"
+            value = input(f"{field_display_name(field)}: ").strip()
+            customer_data[field] = value or field_placeholder(field)
         
         return customer_data
     
-    def display_response_result(self, result: Dict[str, Any], company_info: Dict[str, str]):
-        """Display the generated response and analysis"""
-        print(f"\nGenerating corporate response from {company_info['company_name']} with {result['deviation_tolerance']} deviation tolerance...")
+    def display_response_header(self, company_info: Dict[str, str], deviation_tolerance: str):
+        """Display the heading shown above the generated response"""
+        print(f"\nGenerating corporate response from {company_info['company_name']} with {deviation_tolerance} deviation tolerance...")
         
-        # Display generated response
         print(f"\n{'='*60}")
         print(f"OFFICIAL CORPORATE RESPONSE")
         print(f"{company_info['company_name']} - {company_info['department']}")
         print(f"{'='*60}")
-        print(result['generated_response'])
+    
+    def display_token(self, token: str):
+        """Display a piece of the generated response as it streams in"""
+        print(token, end="", flush=True)
+    
+    def display_response_result(self, result: Dict[str, Any], company_info: Dict[str, str], streamed: bool = False):
+        """Display the generated response and analysis
+        
+        When streamed, the header and response text were already displayed during generation.
+        """
+        # Display generated response
+        if streamed:
+            print()
+        else:
+            self.display_response_header(company_info, result['deviation_tolerance'])
+            print(result['generated_response'])
         print(f"{'='*60}")
         
         # Display standard response and analysis
@@ -142,11 +157,14 @@ class UserInterface:
         print(f"{'='*60}")
         
         # Display deviation analysis
-        print(f"📊 DEVIATION ANALYSIS: {result['deviation_percentage']:.1f}% deviation from standard response")
+        if result['deviation_percentage'] is None:
+            print("📊 DEVIATION ANALYSIS: unavailable")
+        else:
+            print(f"📊 DEVIATION ANALYSIS: {result['deviation_percentage']:.1f}% deviation from standard response")
         print(f"🎯 Target: Stay within {result['max_allowed_deviation']}% deviation ({result['deviation_tolerance']} tolerance)")
         print(result['compliance_message'])
         
-        if not result['is_compliant']:
+        if result['is_compliant'] is False:
             print("Consider adjusting deviation tolerance or reviewing standard response")
         
         print(f"{'='*60}")